@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark voor convert-dovecot-to-mbox.py
+-----------------------------------------
+Doel:
+- Genereert een reproduceerbare, synthetische Dovecot 'users' map (zelfde seed = zelfde boom).
+- Meet count_messages, convert_maildir en de volledige main() bij verschillende --workers waarden.
+- Rapporteert berichten/s, MB/s en piek-RSS per meting.
+- Controleert of elke geëxporteerde mbox correct terug te lezen is via mailbox.mbox.
+
+Gegenereerde structuur:
+- <ROOT>/users/<GUID>                 echte Maildir (cur/new/tmp)
+- <ROOT>/users/voornaam.achternaam    symlink naar <GUID>
+- <ROOT>/users/voornaam, "Voornaam Achternaam", ...  extra symlinks (zie --aliases)
+- <ROOT>/users/shared                 map zonder 'cur', moet overgeslagen worden
+  main() groepeert deze via realpath, dus elke GUID levert precies één mbox op.
+
+Berichten:
+- Grootte volgens --size-dist tussen --size-min en --size-max (KB).
+- Een deel krijgt een base64-bijlage (--attachment-ratio).
+- Een deel bevat regels die beginnen met 'From ' (--from-ratio); die moeten in de mbox
+  als '>From ' terechtkomen, anders splitst mailbox.mbox het bericht bij het teruglezen.
+
+Metingen:
+- Elke meting draait in een apart proces, zodat piek-RSS (via wait4) per meting klopt.
+- count/convert roepen de functies rechtstreeks aan; de tijd wordt in dat proces gemeten.
+- main draait het converter-script zelf, dus inclusief opstarten van de interpreter.
+- Van --repeat herhalingen wordt de snelste tijd en de hoogste piek-RSS gerapporteerd.
+
+Voorbeelden:
+-------------
+# 1) Standaard benchmark in een tijdelijke map
+python3 benchmark-dovecot-to-mbox.py
+
+# 2) Grotere boom, meer workers, 3 herhalingen
+python3 benchmark-dovecot-to-mbox.py --users 16 --messages 2000 --workers 1,2,4,8 --repeat 3
+
+# 3) Alleen een testboom aanmaken om de converter manueel op los te laten
+python3 benchmark-dovecot-to-mbox.py --generate-only --root /tmp/maildir-bench
+python3 convert-dovecot-to-mbox.py --users /tmp/maildir-bench/users --dest /tmp/mbox-out
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import base64
+import hashlib
+import argparse
+import mailbox
+import tempfile
+import subprocess
+import importlib.util
+from email.utils import formatdate
+
+DEFAULT_CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "convert-dovecot-to-mbox.py")
+
+FIRST_NAMES = ["jan", "an", "pieter", "els", "tom", "sofie", "koen", "lies", "bart", "ine", "wouter", "griet"]
+LAST_NAMES = ["peeters", "janssens", "maes", "jacobs", "mertens", "willems", "claes", "goossens", "wouters", "dubois"]
+WORDS = ["offerte", "vergadering", "planning", "factuur", "project", "klant", "levering", "overleg",
+         "budget", "rapport", "café", "één", "afspraak", "dossier", "bijlage", "status", "week", "team"]
+FROM_LINES = ["From de vergadering van gisteren:", "From now on gebruiken we de nieuwe server.",
+              "From: dit lijkt een header maar staat in de body", ">From al eerder geëscaped"]
+FOLDER_NAMES = [".Sent", ".Archief", ".Drafts", ".Junk", ".Klanten", ".Projecten"]
+
+# Zelfde regel als email.generator gebruikt bij het wegschrijven naar mbox
+MANGLE_RE = re.compile(r"^From ", re.MULTILINE)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark convert-dovecot-to-mbox.py op een synthetische Maildir-boom.")
+    parser.add_argument("--root", help="Map voor de gegenereerde boom (standaard: tijdelijke map die achteraf verwijderd wordt)")
+    parser.add_argument("--converter", default=DEFAULT_CONVERTER, help="Pad naar convert-dovecot-to-mbox.py")
+    parser.add_argument("--seed", type=int, default=42, help="Seed voor de generator (default = 42)")
+    parser.add_argument("--users", type=int, default=4, help="Aantal unieke mailboxen (default = 4)")
+    parser.add_argument("--aliases", type=int, default=2, help="Extra symlinks per mailbox naast voornaam.achternaam (default = 2)")
+    parser.add_argument("--folders", type=int, default=0,
+                        help="Aantal Maildir++ submappen per gebruiker, bv. .Sent (default = 0). "
+                             "De converter exporteert enkel INBOX, submappen tellen dus niet mee in de metingen.")
+    parser.add_argument("--messages", type=int, default=250, help="Berichten per map (default = 250)")
+    parser.add_argument("--new-ratio", type=float, default=0.1, help="Fractie berichten in 'new' i.p.v. 'cur' (default = 0.1)")
+    parser.add_argument("--size-dist", choices=("loguniform", "uniform", "fixed"), default="loguniform",
+                        help="Verdeling van berichtgroottes (default = loguniform)")
+    parser.add_argument("--size-min", type=float, default=1, help="Minimale berichtgrootte in KB (default = 1)")
+    parser.add_argument("--size-max", type=float, default=256, help="Maximale berichtgrootte in KB (default = 256)")
+    parser.add_argument("--attachment-ratio", type=float, default=0.2, help="Fractie berichten met bijlage (default = 0.2)")
+    parser.add_argument("--from-ratio", type=float, default=0.1, help="Fractie berichten met 'From '-regels in de body (default = 0.1)")
+    parser.add_argument("--workers", default="1,2,4", help="Komma-gescheiden --workers waarden voor main() (default = 1,2,4)")
+    parser.add_argument("--repeat", type=int, default=1, help="Aantal herhalingen per meting (default = 1)")
+    parser.add_argument("--skip", default="", help="Komma-gescheiden metingen overslaan: count, convert, main")
+    parser.add_argument("--generate-only", action="store_true", help="Genereer alleen de boom, voer geen metingen uit")
+    parser.add_argument("--keep", action="store_true", help="Bewaar gegenereerde boom en mbox-output")
+    # Interne modus: één meting in een apart proces
+    parser.add_argument("--case", choices=("count", "convert"), help=argparse.SUPPRESS)
+    parser.add_argument("--job", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def load_converter(path):
+    spec = importlib.util.spec_from_file_location("convert_dovecot_to_mbox", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --------------------------------------------------------------------------
+# Generator
+# --------------------------------------------------------------------------
+
+def pick_size(rng, args):
+    low, high = args.size_min * 1024, args.size_max * 1024
+    if args.size_dist == "fixed" or high <= low:
+        return int(low)
+    if args.size_dist == "uniform":
+        return int(rng.uniform(low, high))
+    return int(math.exp(rng.uniform(math.log(max(low, 1)), math.log(high))))
+
+
+def make_text(rng, size, with_from):
+    lines = []
+    length = 0
+    if with_from:
+        # Klassiek geval: 'From ' als allereerste regel van de body
+        lines.append(FROM_LINES[0])
+    while length < size:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 11)))
+        if with_from and rng.random() < 0.05:
+            line = rng.choice(FROM_LINES)
+        lines.append(line)
+        length += len(line.encode("utf-8")) + 1
+    if with_from:
+        lines.append(rng.choice(FROM_LINES))
+    return "\n".join(lines) + "\n"
+
+
+def make_message(rng, args, user, folder, index, timestamp):
+    size = pick_size(rng, args)
+    with_from = rng.random() < args.from_ratio
+    with_attachment = rng.random() < args.attachment_ratio
+    msg_id = "<bench-{}-{}-{}@bench.invalid>".format(user["guid"].lower(), folder.strip(".").lower() or "inbox", index)
+
+    headers = [
+        "Return-Path: <{}@example.com>".format(user["name"]),
+        "Message-ID: {}".format(msg_id),
+        "Date: {}".format(formatdate(timestamp)),
+        "From: \"Benchmark afzender\" <afzender{}@example.com>".format(index % 17),
+        "To: {}@example.com".format(user["name"]),
+        "Subject: Benchmark bericht {} ({})".format(index, folder or "INBOX"),
+        "MIME-Version: 1.0",
+    ]
+    text_headers = ["Content-Type: text/plain; charset=utf-8", "Content-Transfer-Encoding: 8bit"]
+
+    if not with_attachment:
+        text = make_text(rng, max(size - 400, 64), with_from)
+        return "\n".join(headers + text_headers) + "\n\n" + text
+
+    boundary = "==bench-{}-{}==".format(user["guid"][:8], index)
+    text = make_text(rng, rng.randint(256, 2048), with_from)
+    raw_size = max((size - len(text) - 800) * 3 // 4, 16)
+    blob = rng.getrandbits(raw_size * 8).to_bytes(raw_size, "little")
+    encoded = base64.encodebytes(blob).decode("ascii")
+    parts = [
+        "\n".join(headers + ["Content-Type: multipart/mixed; boundary=\"{}\"".format(boundary)]),
+        "",
+        "--" + boundary,
+        "\n".join(text_headers),
+        "",
+        text,
+        "--" + boundary,
+        "Content-Type: application/octet-stream; name=\"bijlage-{}.bin\"".format(index),
+        "Content-Transfer-Encoding: base64",
+        "Content-Disposition: attachment; filename=\"bijlage-{}.bin\"".format(index),
+        "",
+        encoded,
+        "--" + boundary + "--",
+        "",
+    ]
+    return "\n".join(parts)
+
+
+def make_guid(rng):
+    return "{:08X}-{:04X}-{:04X}-{:04X}-{:012X}".format(
+        rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(16), rng.getrandbits(48))
+
+
+def make_names(index, aliases, taken):
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    round_no = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+    if round_no:
+        last = "{}{}".format(last, round_no)
+
+    candidates = ["{}.{}".format(first, last), first, "{} {}".format(first.capitalize(), last.capitalize()),
+                  first[0] + last]
+    candidates += ["{}.{}.{}".format(first, last, n) for n in range(2, aliases + 2)]
+    names = []
+    for name in candidates:
+        if len(names) == aliases + 1:
+            break
+        if name not in taken:
+            taken.add(name)
+            names.append(name)
+    return names
+
+
+def write_folder(rng, args, maildir, user, folder, base_time):
+    for sub in ("cur", "new", "tmp"):
+        os.makedirs(os.path.join(maildir, sub))
+    for index in range(args.messages):
+        timestamp = base_time + index * 37
+        data = make_message(rng, args, user, folder, index, timestamp).encode("utf-8")
+        unique = "{}.M{}P{}Q{}.bench,S={}".format(timestamp, index * 7919 % 1000000, 4242, index, len(data))
+        if rng.random() < args.new_ratio:
+            path = os.path.join(maildir, "new", unique)
+        else:
+            path = os.path.join(maildir, "cur", unique + ":2,S")
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def generate_tree(args, root):
+    rng = random.Random(args.seed)
+    users_dir = os.path.join(root, "users")
+    os.makedirs(users_dir)
+    # Vast vertrekpunt zodat bestandsnamen en Date-headers reproduceerbaar zijn
+    base_time = 1600000000
+
+    taken = set()
+    mailboxes = []
+    for index in range(args.users):
+        guid = make_guid(rng)
+        names = make_names(index, args.aliases, taken)
+        user = {"guid": guid, "name": names[0]}
+        maildir = os.path.join(users_dir, guid)
+        write_folder(rng, args, maildir, user, "", base_time + index * 100000)
+        for folder in FOLDER_NAMES[:args.folders]:
+            write_folder(rng, args, os.path.join(maildir, folder), user, folder, base_time + index * 100000)
+        for name in names:
+            os.symlink(guid, os.path.join(users_dir, name))
+        mailboxes.append((names, maildir))
+
+    # Map zonder 'cur': main() moet deze overslaan
+    os.makedirs(os.path.join(users_dir, "shared", "mdbox"))
+    return users_dir, mailboxes
+
+
+def inbox_stats(maildir):
+    msgs, size = 0, 0
+    for sub in ("cur", "new"):
+        subdir = os.path.join(maildir, sub)
+        for name in os.listdir(subdir):
+            path = os.path.join(subdir, name)
+            if os.path.isfile(path):
+                msgs += 1
+                size += os.path.getsize(path)
+    return msgs, size
+
+
+# --------------------------------------------------------------------------
+# Round-trip controle
+# --------------------------------------------------------------------------
+
+def fingerprint(msg, mangle):
+    parts = []
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        payload = part.get_payload()
+        if mangle:
+            payload = MANGLE_RE.sub(">From ", payload)
+        digest = hashlib.sha1(payload.encode("utf-8", "surrogateescape")).hexdigest()
+        parts.append((part.get_content_type(), digest))
+    return msg["Subject"], tuple(parts)
+
+
+def verify_mbox(maildir, mbox_file):
+    if not os.path.isfile(mbox_file):
+        return "mbox ontbreekt: {}".format(os.path.basename(mbox_file))
+
+    expected = {}
+    md = mailbox.Maildir(maildir, factory=None)
+    for msg in md.itervalues():
+        # In de mbox worden 'From '-regels '>From ', dat verwachten we hier ook
+        expected[msg["Message-ID"]] = fingerprint(msg, mangle=True)
+    md.close()
+
+    found = {}
+    mb = mailbox.mbox(mbox_file)
+    for msg in mb.itervalues():
+        msg_id = msg["Message-ID"]
+        if msg_id is None or msg_id in found:
+            mb.close()
+            return "{}: bericht gesplitst of dubbel (Message-ID {})".format(os.path.basename(mbox_file), msg_id)
+        found[msg_id] = fingerprint(msg, mangle=False)
+    mb.close()
+
+    if len(found) != len(expected):
+        return "{}: {} berichten, verwacht {}".format(os.path.basename(mbox_file), len(found), len(expected))
+    for msg_id, value in expected.items():
+        if found.get(msg_id) != value:
+            return "{}: inhoud verschilt voor {}".format(os.path.basename(mbox_file), msg_id)
+    return None
+
+
+def verify_output(jobs, dest):
+    for name, path, output_file in jobs:
+        error = verify_mbox(path, os.path.join(dest, output_file))
+        if error:
+            return error
+    return None
+
+
+# --------------------------------------------------------------------------
+# Metingen
+# --------------------------------------------------------------------------
+
+def run_case(args):
+    """Interne modus: voert één meting uit en schrijft de duur naar het job-bestand."""
+    with open(args.job) as f:
+        job = json.load(f)
+    converter = load_converter(job["converter"])
+
+    # Voortgang van de converter weggooien, dat meet de terminal en niet de conversie
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    saved = os.dup(1)
+    os.dup2(devnull, 1)
+    try:
+        start = time.perf_counter()
+        if args.case == "count":
+            for name, path, output_file in job["mailboxes"]:
+                converter.count_messages(path)
+        else:
+            for name, path, output_file in job["mailboxes"]:
+                converter.convert_maildir(name, path, os.path.join(job["dest"], output_file), 1)
+        duration = time.perf_counter() - start
+        sys.stdout.flush()
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+    job["seconds"] = duration
+    with open(args.job, "w") as f:
+        json.dump(job, f)
+
+
+def rss_mb(usage):
+    # ru_maxrss is in bytes op macOS en in KB op Linux
+    if sys.platform == "darwin":
+        return usage.ru_maxrss / (1024.0 * 1024.0)
+    return usage.ru_maxrss / 1024.0
+
+
+def run_measured(cmd):
+    with open(os.devnull, "wb") as devnull:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=devnull)
+        _, status, usage = os.wait4(proc.pid, 0)
+        duration = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError("Meting mislukt (exitcode {}): {}".format(proc.returncode, " ".join(cmd)))
+    return duration, rss_mb(usage)
+
+
+def measure_function(args, case, jobs, work_dir):
+    best, peak, error = None, 0.0, None
+    for run in range(args.repeat):
+        dest = os.path.join(work_dir, "{}-{}".format(case, run))
+        job_file = os.path.join(work_dir, "{}-{}.json".format(case, run))
+        with open(job_file, "w") as f:
+            json.dump({"converter": args.converter, "dest": dest, "mailboxes": jobs}, f)
+
+        _, rss = run_measured([sys.executable, os.path.abspath(__file__), "--case", case, "--job", job_file])
+        with open(job_file) as f:
+            seconds = json.load(f)["seconds"]
+        best = seconds if best is None else min(best, seconds)
+        peak = max(peak, rss)
+
+        if case == "convert" and error is None:
+            error = verify_output(jobs, dest)
+        if not args.keep:
+            shutil.rmtree(dest, ignore_errors=True)
+    return best, peak, error
+
+
+def measure_main(args, users_dir, jobs, workers, work_dir):
+    best, peak, error = None, 0.0, None
+    for run in range(args.repeat):
+        dest = os.path.join(work_dir, "main-w{}-{}".format(workers, run))
+        cmd = [sys.executable, args.converter, "--users", users_dir, "--dest", dest, "--workers", str(workers)]
+        seconds, rss = run_measured(cmd)
+        best = seconds if best is None else min(best, seconds)
+        peak = max(peak, rss)
+
+        if error is None:
+            error = verify_output(jobs, dest)
+        if not args.keep:
+            shutil.rmtree(dest, ignore_errors=True)
+    return best, peak, error
+
+
+def print_row(label, workers, msgs, size, seconds, rss, error):
+    mb = size / (1024.0 * 1024.0)
+    print("{:<16} {:>7} {:>10} {:>9.1f} {:>9.3f} {:>12.0f} {:>8.1f} {:>10.1f}   {}".format(
+        label, workers, msgs, mb, seconds, msgs / seconds if seconds else 0, mb / seconds if seconds else 0,
+        rss, error or "ok"))
+
+
+def main():
+    args = parse_args()
+
+    if args.case:
+        run_case(args)
+        return
+
+    if not os.path.isfile(args.converter):
+        print("Converter niet gevonden: {}".format(args.converter))
+        sys.exit(1)
+
+    root = args.root
+    if root is None:
+        root = tempfile.mkdtemp(prefix="maildir-bench-")
+    elif os.path.exists(root) and os.listdir(root):
+        print("Root-map is niet leeg: {}".format(root))
+        sys.exit(1)
+    elif not os.path.isdir(root):
+        os.makedirs(root)
+
+    try:
+        print("Boom genereren in {} (seed {})...".format(root, args.seed))
+        start = time.time()
+        users_dir, mailboxes = generate_tree(args, root)
+
+        # Zelfde naamkeuze als main() van de converter, zodat we weten welke mbox bij welke Maildir hoort
+        converter = load_converter(args.converter)
+        jobs = []
+        total_msgs, total_size = 0, 0
+        for names, maildir in mailboxes:
+            name = converter.choose_best_name(set(names))
+            jobs.append((name, maildir, name.replace(" ", "_") + ".mbox"))
+            msgs, size = inbox_stats(maildir)
+            total_msgs += msgs
+            total_size += size
+
+        print("{} mailboxen, {} symlinks, {} berichten, {:.1f} MB in INBOX ({})".format(
+            len(mailboxes), sum(len(n) for n, _ in mailboxes), total_msgs, total_size / (1024.0 * 1024.0),
+            converter.format_duration(time.time() - start)))
+
+        if args.generate_only:
+            print("Users-map: {}".format(users_dir))
+            return
+
+        skip = set(s.strip() for s in args.skip.split(",") if s.strip())
+        work_dir = os.path.join(root, "output")
+        os.makedirs(work_dir)
+        failed = False
+
+        print("\n{:<16} {:>7} {:>10} {:>9} {:>9} {:>12} {:>8} {:>10}   {}".format(
+            "Meting", "Workers", "Berichten", "MB", "Tijd (s)", "Berichten/s", "MB/s", "Piek RSS", "Round-trip"))
+        print("-" * 105)
+
+        if "count" not in skip:
+            seconds, rss, error = measure_function(args, "count", jobs, work_dir)
+            print_row("count_messages", "-", total_msgs, total_size, seconds, rss, "n.v.t.")
+
+        if "convert" not in skip:
+            seconds, rss, error = measure_function(args, "convert", jobs, work_dir)
+            print_row("convert_maildir", 1, total_msgs, total_size, seconds, rss, error)
+            failed = failed or error is not None
+
+        if "main" not in skip:
+            for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+                seconds, rss, error = measure_main(args, users_dir, jobs, workers, work_dir)
+                print_row("main", workers, total_msgs, total_size, seconds, rss, error)
+                failed = failed or error is not None
+
+        if failed:
+            print("\nRound-trip controle mislukt.")
+            sys.exit(1)
+    finally:
+        if args.keep or args.generate_only:
+            print("Boom bewaard in {}".format(root))
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()